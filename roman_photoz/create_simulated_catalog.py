@@ -2,15 +2,15 @@
 
 import argparse
 import os
-from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from importlib import resources
 from pathlib import Path
 
 import astropy.units as u
 import lephare as lp
 import numpy as np
+import pandas as pd
 from astropy.table import Table
-from numpy.lib import recfunctions as rfn
 from rail.core import DataStore
 
 from roman_photoz import create_roman_filters
@@ -36,7 +36,7 @@ class SimulatedCatalog:
 
     Attributes
     ----------
-    data : OrderedDict
+    data : dict
         A dictionary to store the data.
     lephare_config : dict
         Configuration for LePhare.
@@ -60,7 +60,7 @@ class SimulatedCatalog:
         """
         Initializes the SimulatedCatalog class.
         """
-        self.data = OrderedDict()
+        self.data = {}
         self.lephare_config = ROMAN_DEFAULT_CONFIG
         self.nobj = nobj
         self.flux_cols = []
@@ -70,6 +70,9 @@ class SimulatedCatalog:
         self.simulated_data_filename = ""
         self.filter_lib = None
         self.simulated_data = None
+        self._mag_cols = []
+        self._redshift_col = "redshift"
+        self._keep_cols = []
         self._roman_catalog_template = self._read_roman_template_catalog()
         self.filter_list = get_roman_filter_list()
         self.mag_noise = mag_noise
@@ -223,45 +226,16 @@ class SimulatedCatalog:
         Table or None
             The final simulated catalog if return_catalog is True, otherwise None.
         """
-        fname = self.lephare_config["GAL_LIB_OUT"]
-        catalog_name = Path(LEPHAREWORK, "lib_mag", f"{fname}.dat").as_posix()
-        colnames = self._create_header(catalog_name=catalog_name)
-
-        # some columns are actually integers, e.g., model, ext_law, N_filt
-        # but treating these as floats doesn't really hurt anything; we are
-        # using these to generate a romancal catalog parquet output file
-        # that doesn't contain these columns anyway
-        self.simulated_data = np.loadtxt(
-            catalog_name, dtype=[(n, "f4") for n in colnames], encoding="utf-8"
-        )
-        self.simulated_data = self.simulated_data[self.simulated_data["redshift"] > 0]
-
-        # we're keeping only the columns with magnitude and true redshift information
-        cols_to_keep = [
-            name
-            for name in self.simulated_data.dtype.names
-            if "mag" in name or "redshift" in name
-        ]
+        self._read_simulated_data()
 
         # we're matching the number of objects in the template
         num_lines = self.nobj
-        random_lines = self._pick_random_lines(num_lines)
-        catalog = random_lines[cols_to_keep]
-
-        final_catalog = self._add_error(catalog, mag_noise=self.mag_noise)
-        final_catalog = self._add_ids(final_catalog)
-
-        redshift = final_catalog["redshift"]
-
-        final_catalog = rfn.append_fields(
-            final_catalog, "redshift_true", redshift, usemask=False
+        # from here on the catalog is kept as a dict of column arrays, so
+        # adding, renaming and dropping columns doesn't copy the whole table
+        catalog = self._pick_random_lines(num_lines, columns=self._keep_cols)
+        final_catalog = self._finalize_catalog(
+            catalog, noise_seed=self._seed_sequences()[1]
         )
-        # remove the redshift column
-        final_catalog = rfn.drop_fields(final_catalog, ["redshift"])
-
-        final_catalog = self._create_simulated_roman_catalog(final_catalog)
-
-        final_catalog = Table(final_catalog)
 
         if return_catalog:
             return final_catalog
@@ -274,6 +248,87 @@ class SimulatedCatalog:
             )
             return None
 
+    def _seed_sequences(self):
+        """
+        Create independent seed sequences from ``self.seed``.
+
+        Returns
+        -------
+        list of np.random.SeedSequence
+            The seed sequences for the row selection and for the noise,
+            respectively.
+        """
+        return np.random.SeedSequence(self.seed).spawn(2)
+
+    def _read_simulated_data(self):
+        """
+        Read the magnitude and redshift columns of the LePhare library.
+
+        The data (objects with a positive redshift only) is stored in
+        ``self.simulated_data``.
+        """
+        fname = self.lephare_config["GAL_LIB_OUT"]
+        catalog_name = Path(LEPHAREWORK, "lib_mag", f"{fname}.dat").as_posix()
+        colnames = self._create_header(catalog_name=catalog_name)
+
+        # we're keeping only the columns with magnitude and true redshift
+        # information, so the other columns are skipped at parse time;
+        # the selection is computed once here and reused downstream
+        self._mag_cols = [name for name in colnames if "mag" in name]
+        self._keep_cols = [
+            name
+            for name in colnames
+            if name in self._mag_cols or self._redshift_col in name
+        ]
+
+        # pandas' C tokenizer is much faster than np.loadtxt on large libraries
+        self.simulated_data = pd.read_csv(
+            catalog_name,
+            sep=r"\s+",
+            header=None,
+            names=colnames,
+            usecols=self._keep_cols,
+            index_col=False,
+            comment="#",
+            dtype=np.float32,
+            engine="c",
+            encoding="utf-8",
+        ).to_records(index=False)
+        self.simulated_data = self.simulated_data[
+            self.simulated_data[self._redshift_col] > 0
+        ]
+
+    def _finalize_catalog(self, catalog, noise_seed=None, label_start: int = 1):
+        """
+        Turn the picked lines into a simulated Roman catalog.
+
+        Parameters
+        ----------
+        catalog : dict of np.ndarray
+            The magnitude and redshift columns of the picked lines.
+        noise_seed : int or np.random.SeedSequence, optional
+            The seed for the noise added to the magnitudes.
+        label_start : int, optional
+            The label of the first object (default: 1).
+
+        Returns
+        -------
+        Table
+            The simulated catalog following the Roman catalog template.
+        """
+        catalog = self._add_error(
+            catalog,
+            mag_noise=self.mag_noise,
+            seed=noise_seed,
+            mag_cols=self._mag_cols or None,
+        )
+        catalog = self._add_ids(catalog, start=label_start)
+        catalog["redshift_true"] = catalog.pop(self._redshift_col)
+
+        # this is already an astropy Table; wrapping it again would copy
+        # every column before writing
+        return self._create_simulated_roman_catalog(catalog)
+
     def _abmag_to_njy(self, abmag):
         # convert AB magnitude to flux density in nJy
         return (abmag * u.ABmag).to(u.nJy)
@@ -284,8 +339,13 @@ class SimulatedCatalog:
 
         Parameters
         ----------
-        catalog : np.ndarray
-            The catalog data to update the Roman catalog template with.
+        catalog : dict of np.ndarray
+            The catalog columns to update the Roman catalog template with.
+
+        Returns
+        -------
+        Table
+            The simulated catalog following the Roman catalog template.
         """
         filter_list = self.filter_list
 
@@ -297,7 +357,7 @@ class SimulatedCatalog:
         simulated_roman_catalog = Table()
         for field in self._roman_catalog_template.dtype.names:
             simulated_roman_catalog[field] = np.zeros(
-                len(catalog), dtype=self._roman_catalog_template.dtype[field]
+                len(catalog["label"]), dtype=self._roman_catalog_template.dtype[field]
             )
 
         simulated_roman_catalog["label"] = catalog["label"]
@@ -310,7 +370,7 @@ class SimulatedCatalog:
                     # flux error = ln(10) / 2.5 mag_error
                     flux = self._abmag_to_njy(catalog[f"magnitude{filter_name}"])
                     errname = f"magnitude{filter_name}_err"
-                    if errname in catalog.dtype.names:
+                    if errname in catalog:
                         simulated_value = np.log(10) / 2.5 * flux * catalog[errname]
                     else:
                         simulated_value = 0.01 * flux
@@ -326,35 +386,30 @@ class SimulatedCatalog:
 
         return simulated_roman_catalog
 
-    def _add_ids(self, catalog):
+    def _add_ids(self, catalog, start: int = 1):
         """
         Add an ID column to the catalog.
 
         Parameters
         ----------
-        catalog : np.ndarray
-            The catalog data.
+        catalog : dict of np.ndarray
+            The catalog columns.
+        start : int, optional
+            The ID of the first object (default: 1).
 
         Returns
         -------
-        np.ndarray
-            The catalog data with an ID column added.
+        dict of np.ndarray
+            The catalog columns with an ID column (``label``) added first.
         """
-        ids = np.arange(1, len(catalog) + 1)
-        catalog = rfn.append_fields(catalog, "label", ids, usemask=False)
-
-        new_dtype = [("label", catalog["label"].dtype)] + [
-            (name, catalog[name].dtype)
-            for name in catalog.dtype.names
-            if name != "label"
-        ]
-        new_catalog = np.empty(catalog.shape, dtype=new_dtype)
-        for name in new_catalog.dtype.names:
-            new_catalog[name] = catalog[name]
+        nrows = len(next(iter(catalog.values()), []))
+        ids = np.arange(start, start + nrows, dtype=np.int64)
+        # the columns are only referenced, not copied
+        return {"label": ids, **catalog}
 
-        return new_catalog
-
-    def _add_error(self, catalog, mag_noise: float = 0.1, seed: int = 42):
+    def _add_error(
+        self, catalog, mag_noise: float = 0.1, seed: int = 42, mag_cols=None
+    ):
         """
         Add a Gaussian error to each magnitude column in the catalog.
 
@@ -364,39 +419,62 @@ class SimulatedCatalog:
 
         Parameters
         ----------
-        catalog : np.ndarray
-            The catalog data.
+        catalog : dict of np.ndarray
+            The catalog columns.
         mag_noise : float, optional
             The standard deviation of the Gaussian noise to be added to the observed magnitudes (default: 0.1).
-        seed : int, optional
+        seed : int or np.random.SeedSequence, optional
             The seed for the random number generator.
+        mag_cols : list of str, optional
+            The names of the magnitude columns in the catalog. If None
+            (default), every column containing "mag" is used.
 
         Returns
         -------
-        np.ndarray
-            The catalog data with error columns added.
+        dict of np.ndarray
+            The catalog columns with error columns added.
         """
         # don't do anything if we're not adding noise
         if mag_noise <= 0:
             logger.info("Not adding noise to the catalog.")
             return catalog
 
-        new_dtype = []
-        for col in catalog.dtype.names:
-            new_dtype.append((col, catalog[col].dtype))
-            if "mag" in col:
-                new_dtype.append((f"{col}_err", catalog[col].dtype))
-
-        new_catalog = np.zeros(catalog.shape, dtype=new_dtype)
-        rng = np.random.default_rng(seed=seed)
-        for col in catalog.dtype.names:
-            # add some noise to the magnitudes
-            new_catalog[col] = rng.normal(
-                loc=catalog[col], scale=mag_noise, size=catalog[col].shape
-            )
-            if "mag" in col:
+        if mag_cols is None:
+            mag_cols = [col for col in catalog if "mag" in col]
+
+        # stack the magnitudes into a contiguous (n, k) array so that the noise
+        # can be drawn and added in a single vectorized operation
+        nrows = len(next(iter(catalog.values()), []))
+        # work in float32 if all the magnitudes are float32 (as read from the
+        # LePhare library) so that the noise isn't drawn in double precision
+        # only to be downcast afterwards
+        dtype = np.result_type(np.float32, *(catalog[col].dtype for col in mag_cols))
+        if dtype != np.float32:
+            dtype = np.float64
+        mags = np.empty((nrows, len(mag_cols)), dtype=dtype)
+        for i, col in enumerate(mag_cols):
+            mags[:, i] = catalog[col]
+
+        rng = np.random.Generator(np.random.SFC64(seed))
+        # add some noise to the magnitudes (in place, to avoid temporaries)
+        noisy_mags = rng.standard_normal(mags.shape, dtype=dtype)
+        noisy_mags *= mag_noise
+        noisy_mags += mags
+
+        noisy_cols = {col: i for i, col in enumerate(mag_cols)}
+        new_catalog = {}
+        for col, values in catalog.items():
+            if col in noisy_cols:
+                # no copy when the dtype already matches (the usual case)
+                new_catalog[col] = noisy_mags[:, noisy_cols[col]].astype(
+                    values.dtype, copy=False
+                )
                 # add error
-                new_catalog[f"{col}_err"] = mag_noise
+                new_catalog[f"{col}_err"] = np.full(
+                    nrows, mag_noise, dtype=values.dtype
+                )
+            else:
+                new_catalog[col] = values
 
         return new_catalog
 
@@ -420,19 +498,25 @@ class SimulatedCatalog:
             for _ in range(len(self.filter_list) + 1):
                 next(f)
             colname_list = f.readline().strip().split(" ")
-        colnames = [x for x in colname_list if "[N_filt]" not in x]
-        colvector = [x for x in colname_list if "[N_filt]" in x]
-        expanded_colvector = [
-            x.replace("[N_filt]", filter_name)
-            for x in colvector
+        # split the scalar and the vector ([N_filt]) columns in a single pass,
+        # dropping the comment markers along the way
+        colnames = []
+        templates = []
+        for x in colname_list:
+            if "#" in x:
+                continue
+            if "[N_filt]" in x:
+                templates.append(x.replace("[N_filt]", "{filter_name}"))
+            else:
+                colnames.append(x)
+        colnames.extend(
+            template.format(filter_name=filter_name)
+            for template in templates
             for filter_name in self.filter_list
-        ]
-        colnames.extend(expanded_colvector)
-
-        colnames = [x for x in colnames if "#" not in x]
+        )
         return colnames
 
-    def _pick_random_lines(self, num_lines: int):
+    def _pick_random_lines(self, num_lines: int, columns=None):
         """
         Pick random lines from the data array.
 
@@ -440,12 +524,18 @@ class SimulatedCatalog:
         ----------
         num_lines : int
             The number of random lines to pick.
+        columns : list of str, optional
+            The columns to return. If None (default), all the columns
+            of the data array are returned.
 
         Returns
         -------
-        np.ndarray
-            An array containing the randomly picked lines.
+        dict of np.ndarray
+            The requested columns of the randomly picked lines.
         """
+        if columns is None and self.simulated_data is not None:
+            columns = self.simulated_data.dtype.names
+
         if num_lines > 0:
             if self.simulated_data is None:
                 raise ValueError(
@@ -458,11 +548,16 @@ class SimulatedCatalog:
                     f"Requested {num_lines} lines, but only {total_lines} lines are available."
                 )
 
-            rng = np.random.default_rng(seed=self.seed)
+            rng = np.random.Generator(np.random.SFC64(self._seed_sequences()[0]))
             random_indices = rng.choice(total_lines, num_lines, replace=False)
-            return self.simulated_data[random_indices]
+            # take from each (contiguous) column rather than fancy-indexing
+            # the structured array
+            return {
+                name: np.take(self.simulated_data[name], random_indices)
+                for name in columns
+            }
         else:
-            return self.simulated_data
+            return {name: self.simulated_data[name] for name in columns}
 
     def process(
         self,
@@ -501,6 +596,129 @@ class SimulatedCatalog:
         return result
 
 
+def _create_chunk(
+    catalog: dict,
+    mag_cols: list,
+    mag_noise: float,
+    noise_seed,
+    label_start: int,
+    output_path: str,
+    output_filename: str,
+):
+    """
+    Create and save one chunk of a simulated catalog (run in a worker process).
+    """
+    simulated_catalog = SimulatedCatalog(
+        nobj=len(next(iter(catalog.values()))), mag_noise=mag_noise
+    )
+    simulated_catalog._mag_cols = mag_cols
+    final_catalog = simulated_catalog._finalize_catalog(
+        catalog, noise_seed=noise_seed, label_start=label_start
+    )
+    save_catalog(
+        final_catalog,
+        output_filename=output_filename,
+        output_path=output_path,
+        overwrite=True,
+    )
+    return Path(output_path, output_filename).as_posix()
+
+
+def create_simulated_catalog_chunks(
+    nchunks: int,
+    nobj: int,
+    mag_noise: float = 0.1,
+    seed=None,
+    output_path: str = "",
+    output_filename: str = DEFAULT_OUTPUT_CATALOG_FILENAME,
+    refresh_lib_mag: bool = False,
+    jobs=None,
+):
+    """
+    Create a simulated catalog split into several files, in parallel.
+
+    The LePhare synthetic magnitudes are generated and read once, and the
+    ``nobj`` objects are picked (without replacement) in this process; each
+    chunk of picked objects is then finalized in a separate process and saved
+    as ``<output_filename stem>_chunk<N><suffix>``. The labels run
+    continuously across the chunks, so the concatenated chunks are
+    equivalent to a single catalog of ``nobj`` objects.
+
+    Parameters
+    ----------
+    nchunks : int
+        The number of chunks (output files) to create.
+    nobj : int
+        The total number of objects, distributed as evenly as possible
+        among the chunks.
+    mag_noise : float, optional
+        The standard deviation of the Gaussian noise added to the magnitudes.
+    seed : int, optional
+        The seed for the random number generator; each chunk draws its noise
+        from an independent stream spawned from it (default: None).
+    output_path : str, optional
+        Path to save the output catalogs (default: "").
+    output_filename : str, optional
+        Filename used as the template for the chunk filenames.
+    refresh_lib_mag : bool, optional
+        If True, regenerate the synthetic magnitudes even if they already exist.
+    jobs : int, optional
+        The maximum number of worker processes (default: number of CPUs).
+
+    Returns
+    -------
+    list of str
+        The paths of the saved chunk files.
+    """
+    if nchunks < 1:
+        raise ValueError(f"nchunks must be at least 1, got {nchunks}.")
+    if nobj < nchunks:
+        raise ValueError(
+            f"Requested {nobj} objects, but at least one object per chunk "
+            f"({nchunks}) is needed."
+        )
+
+    # generate and read the LePhare data once, in this process, so that the
+    # workers neither compete to write the same files nor re-parse them
+    simulated_catalog = SimulatedCatalog(nobj=nobj, mag_noise=mag_noise, seed=seed)
+    simulated_catalog._create_filter_files()
+    simulated_catalog._create_simulated_data(refresh_lib_mag=refresh_lib_mag)
+    simulated_catalog._read_simulated_data()
+
+    # a single draw without replacement, so no object appears in two chunks
+    catalog = simulated_catalog._pick_random_lines(
+        nobj, columns=simulated_catalog._keep_cols
+    )
+    noise_seeds = simulated_catalog._seed_sequences()[1].spawn(nchunks)
+
+    stem, suffix = Path(output_filename).stem, Path(output_filename).suffix
+    chunk_sizes = [
+        nobj // nchunks + (1 if i < nobj % nchunks else 0) for i in range(nchunks)
+    ]
+    chunk_starts = np.cumsum([0] + chunk_sizes[:-1]).tolist()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                _create_chunk,
+                catalog={
+                    name: values[start : start + chunk_size]
+                    for name, values in catalog.items()
+                },
+                mag_cols=simulated_catalog._mag_cols,
+                mag_noise=mag_noise,
+                noise_seed=noise_seeds[i],
+                label_start=start + 1,
+                output_path=output_path,
+                output_filename=f"{stem}_chunk{i}{suffix}",
+            )
+            for i, (start, chunk_size) in enumerate(zip(chunk_starts, chunk_sizes))
+        ]
+        output_files = [future.result() for future in futures]
+
+    logger.info(f"DONE: {len(output_files)} chunks saved")
+    return output_files
+
+
 def main():
     def parse_args():
         parser = argparse.ArgumentParser(
@@ -538,21 +756,54 @@ def main():
             default=None,
             help="Seed for the random number generator used in picking random lines and adding noise (default: None).",
         )
-        return parser.parse_args()
+        parser.add_argument(
+            "--nchunks",
+            type=int,
+            default=1,
+            help="Split the catalog into this many files, created in parallel (requires --nobj).",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=None,
+            help="Maximum number of worker processes used with --nchunks (default: number of CPUs).",
+        )
+        args = parser.parse_args()
+        if args.nchunks < 1:
+            parser.error("--nchunks must be at least 1.")
+        if args.jobs is not None and args.jobs < 1:
+            parser.error("--jobs must be at least 1.")
+        if args.nchunks > 1 and args.nobj < args.nchunks:
+            parser.error(
+                "--nchunks requires --nobj to be at least the number of chunks."
+            )
+        return args
 
     args = parse_args()
 
     logger.info("Starting simulated catalog creation...")
-    simulated_catalog = SimulatedCatalog(
-        nobj=args.nobj,
-        mag_noise=args.mag_noise,
-        seed=args.seed,
-    )
-    simulated_catalog.process(
-        output_path=args.output_path,
-        output_filename=args.output_filename,
-        refresh_lib_mag=args.refresh_lib_mag,
-    )
+    if args.nchunks > 1:
+        create_simulated_catalog_chunks(
+            nchunks=args.nchunks,
+            nobj=args.nobj,
+            mag_noise=args.mag_noise,
+            seed=args.seed,
+            output_path=args.output_path,
+            output_filename=args.output_filename,
+            refresh_lib_mag=args.refresh_lib_mag,
+            jobs=args.jobs,
+        )
+    else:
+        simulated_catalog = SimulatedCatalog(
+            nobj=args.nobj,
+            mag_noise=args.mag_noise,
+            seed=args.seed,
+        )
+        simulated_catalog.process(
+            output_path=args.output_path,
+            output_filename=args.output_filename,
+            refresh_lib_mag=args.refresh_lib_mag,
+        )
     logger.info("Simulated catalog creation completed successfully")
 
 
@@ -1,9 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
+import astropy.units as u
 import numpy as np
 import pytest
+from astropy.table import Table
 
-from roman_photoz.create_simulated_catalog import SimulatedCatalog
+from roman_photoz.create_simulated_catalog import (
+    SimulatedCatalog,
+    create_simulated_catalog_chunks,
+)
 from roman_photoz.utils.roman_photoz_utils import get_roman_filter_list
 
 FILTER_LIST = get_roman_filter_list()
@@ -31,9 +37,9 @@ def test_is_folder_not_empty(simulated_catalog):
 
 
 def test_add_ids(simulated_catalog):
-    catalog = np.array([(1.0, 2.0), (3.0, 4.0)], dtype=[("col1", "f8"), ("col2", "f8")])
+    catalog = {"col1": np.array([1.0, 3.0]), "col2": np.array([2.0, 4.0])}
     updated_catalog = simulated_catalog._add_ids(catalog)
-    assert "label" in updated_catalog.dtype.names
+    assert list(updated_catalog) == ["label", "col1", "col2"]
     assert np.array_equal(updated_catalog["label"], [1, 2])
 
 
@@ -46,13 +52,13 @@ def test_add_ids(simulated_catalog):
     ],
 )
 def test_add_error(simulated_catalog, params):
-    catalog = np.array([(1.0, 2.0)], dtype=[("mag1", "f8"), ("mag2", "f8")])
+    catalog = {"mag1": np.array([1.0]), "mag2": np.array([2.0])}
     updated_catalog = simulated_catalog._add_error(
         catalog, mag_noise=params["mag_noise"], seed=123
     )
     # ensure that the new columns are added and values are within the expected range
-    assert "mag1_err" in updated_catalog.dtype.names
-    assert "mag2_err" in updated_catalog.dtype.names
+    assert "mag1_err" in updated_catalog
+    assert "mag2_err" in updated_catalog
     assert updated_catalog["mag1_err"][0] == params["mag_noise"]
     assert updated_catalog["mag2_err"][0] == params["mag_noise"]
     # ensure that noise has been added to the original magnitudes
@@ -60,12 +66,32 @@ def test_add_error(simulated_catalog, params):
     assert np.all(updated_catalog["mag2"] != catalog["mag2"])
 
 
+def test_add_error_float32(simulated_catalog):
+    catalog = {
+        "mag1": np.array([20.0, 21.0], dtype="f4"),
+        "redshift": np.array([0.5, 1.0], dtype="f4"),
+    }
+    updated_catalog = simulated_catalog._add_error(catalog, mag_noise=0.1, seed=123)
+    assert updated_catalog["mag1"].dtype == np.float32
+    assert updated_catalog["mag1_err"].dtype == np.float32
+    # only the magnitudes get noise
+    assert np.all(updated_catalog["mag1"] != catalog["mag1"])
+    assert np.array_equal(updated_catalog["redshift"], catalog["redshift"])
+
+
 def test_pick_random_lines(simulated_catalog):
     simulated_catalog.simulated_data = np.array(
         [(1.0, 2.0), (3.0, 4.0), (5.0, 6.0)], dtype=[("col1", "f8"), ("col2", "f8")]
     )
     random_lines = simulated_catalog._pick_random_lines(2)
-    assert len(random_lines) == 2
+    assert list(random_lines) == ["col1", "col2"]
+    assert len(random_lines["col1"]) == 2
+    assert len(random_lines["col2"]) == 2
+    # rows are picked together across columns
+    assert np.array_equal(random_lines["col2"], random_lines["col1"] + 1)
+
+    random_lines = simulated_catalog._pick_random_lines(2, columns=["col2"])
+    assert list(random_lines) == ["col2"]
 
 
 def test_create_header(simulated_catalog):
@@ -83,6 +109,49 @@ def test_create_header(simulated_catalog):
     assert all(f"kcorr{filter}" in colnames for filter in FILTER_LIST)
 
 
+def test_create_simulated_input_catalog(tmp_path):
+    simulated_catalog = SimulatedCatalog(nobj=-1, mag_noise=0)
+    fname = simulated_catalog.lephare_config["GAL_LIB_OUT"]
+    catalog_name = tmp_path / "lib_mag" / f"{fname}.dat"
+    catalog_name.parent.mkdir()
+
+    # mimic the layout of the LePhare library: N_filt + 1 header lines, the
+    # column names and then the data (including objects with redshift <= 0)
+    nfilt = len(FILTER_LIST)
+    redshifts = [0.5, 0.0, 1.2, -1.0, 2.0]
+    lines = [f"# header line {i}" for i in range(nfilt + 1)]
+    lines.append(
+        "# model ext_law E(B-V) redshift N_filt magnitude[N_filt] kcorr[N_filt]"
+    )
+    for i, redshift in enumerate(redshifts):
+        mags = [f"{20 + i + 0.1 * j:.2f}" for j in range(nfilt)]
+        kcorrs = ["0.5"] * nfilt
+        scalars = ["1", "0", "0.1", str(redshift), str(nfilt)]
+        lines.append(" ".join(scalars + mags + kcorrs))
+    catalog_name.write_text("\n".join(lines) + "\n")
+
+    with patch("roman_photoz.create_simulated_catalog.LEPHAREWORK", tmp_path):
+        final_catalog = simulated_catalog._create_simulated_input_catalog(
+            return_catalog=True
+        )
+
+    # only the objects with a positive redshift are kept
+    assert len(final_catalog) == 3
+    assert set(final_catalog.colnames) == set(
+        simulated_catalog._roman_catalog_template.colnames
+    ) | {"redshift_true"}
+    assert "redshift" not in final_catalog.colnames
+    assert np.array_equal(final_catalog["label"], [1, 2, 3])
+    np.testing.assert_allclose(final_catalog["redshift_true"], [0.5, 1.2, 2.0])
+    for j, filter in enumerate(FILTER_LIST):
+        mags = np.array([20 + i + 0.1 * j for i in (0, 2, 4)])
+        np.testing.assert_allclose(
+            np.asarray(final_catalog[f"segment_{filter}_flux"]),
+            (mags * u.ABmag).to_value(u.nJy),
+            rtol=1e-5,
+        )
+
+
 def test_process(simulated_catalog):
     with (
         patch.object(
@@ -101,3 +170,77 @@ def test_process(simulated_catalog):
         mock_create_filter_files.assert_called_once()
         mock_create_simulated_data.assert_called_once()
         mock_create_simulated_input_catalog.assert_called_once()
+
+
+def test_seed_sequences():
+    simulated_catalog = SimulatedCatalog(nobj=10, seed=5)
+    pick_seed, noise_seed = simulated_catalog._seed_sequences()
+    # the row selection and the noise use independent streams...
+    assert not np.array_equal(
+        pick_seed.generate_state(4), noise_seed.generate_state(4)
+    )
+    # ...that are reproducible for a given seed
+    assert np.array_equal(
+        simulated_catalog._seed_sequences()[1].generate_state(4),
+        noise_seed.generate_state(4),
+    )
+
+
+def _fake_read_simulated_data(self, nrows=20):
+    # stand-in for the LePhare library: the redshifts identify the rows
+    self._mag_cols = [f"magnitude{filter}" for filter in FILTER_LIST]
+    self._keep_cols = self._mag_cols + ["redshift"]
+    data = np.zeros(nrows, dtype=[(name, "f4") for name in self._keep_cols])
+    for name in self._mag_cols:
+        data[name] = 20 + 0.1 * np.arange(nrows)
+    data["redshift"] = 0.05 * np.arange(1, nrows + 1)
+    self.simulated_data = data
+
+
+def test_create_simulated_catalog_chunks(tmp_path):
+    with (
+        patch(
+            "roman_photoz.create_simulated_catalog.ProcessPoolExecutor",
+            ThreadPoolExecutor,
+        ),
+        patch.object(SimulatedCatalog, "_create_filter_files") as mock_filter_files,
+        patch.object(SimulatedCatalog, "_create_simulated_data") as mock_data,
+        patch.object(
+            SimulatedCatalog,
+            "_read_simulated_data",
+            autospec=True,
+            side_effect=_fake_read_simulated_data,
+        ) as mock_read,
+    ):
+        output_files = create_simulated_catalog_chunks(
+            nchunks=3,
+            nobj=10,
+            mag_noise=0.1,
+            seed=1,
+            output_path=tmp_path,
+            output_filename="cat.parquet",
+            jobs=2,
+        )
+        # the LePhare data is only generated and read once
+        mock_filter_files.assert_called_once()
+        mock_data.assert_called_once()
+        mock_read.assert_called_once()
+
+    assert output_files == [
+        (tmp_path / f"cat_chunk{i}.parquet").as_posix() for i in range(3)
+    ]
+    chunks = [Table.read(filename) for filename in output_files]
+    assert [len(chunk) for chunk in chunks] == [4, 3, 3]
+    # labels run continuously across the chunks
+    labels = np.concatenate([np.asarray(chunk["label"]) for chunk in chunks])
+    assert np.array_equal(labels, np.arange(1, 11))
+    # no object is picked twice
+    redshifts = np.concatenate(
+        [np.asarray(chunk["redshift_true"]) for chunk in chunks]
+    )
+    assert len(np.unique(redshifts)) == 10
+
+
+def test_create_simulated_catalog_chunks_invalid_nobj():
+    with pytest.raises(ValueError):
+        create_simulated_catalog_chunks(nchunks=3, nobj=2)
@@ -35,6 +35,13 @@ def test_create_random_catalog_reproducibility(sample_table):
     assert np.all(out1["B"] == out2["B"])
 
 
+def test_create_random_catalog_includes_last_row():
+    """Test that create_random_catalog can select every row, including the last one."""
+    table = Table({"A": [1, 2]})
+    out = create_random_catalog(table, n=100, seed=7)
+    assert set(out["A"]) == {1, 2}
+
+
 def test_njy_to_mgy_scalar():
     """Test njy_to_mgy conversion for a scalar value."""
     flux_njy = 3631e9 * u.Unit("nJy")  # 1 maggy
@@ -79,6 +86,27 @@ def test_update_fluxes(monkeypatch):
     )
 
 
+def test_update_fluxes_flux_units():
+    """Test that update_fluxes honors the unit of each flux column."""
+    target = Table({"F213": [1.0, 2.0], "F184": [3.0, 4.0]})
+    flux_njy = Table(
+        {
+            "segment_f213_flux": [1e9, 2e9] * u.Unit("nJy"),
+            "segment_f184_flux": [3e9, 4e9] * u.Unit("nJy"),
+            "label": [10, 20],
+            "redshift_true": [0.1, 0.2],
+        }
+    )
+    flux_mixed = flux_njy.copy()
+    flux_mixed["segment_f184_flux"] = [3e6, 4e6] * u.Unit("uJy")
+
+    expected = update_fluxes(target, flux_njy, ref_filter="F213")
+    updated = update_fluxes(target, flux_mixed, ref_filter="F213")
+    np.testing.assert_allclose(
+        np.asarray(updated["F184"]), np.asarray(expected["F184"])
+    )
+
+
 def test_process_catalog_return_vs_save(tmp_path, monkeypatch):
     """
     Test that SimulatedCatalog.process() can either return the catalog to memory or save it to a file,
@@ -23,8 +23,9 @@ def create_random_catalog(table: Table, n: int, seed: int = 13):
     Table
         A new Table containing n randomly selected rows from the input table.
     """
-    rng = np.random.default_rng(seed)
-    idx = rng.integers(0, len(table) - 1, size=n)
+    rng = np.random.Generator(np.random.SFC64(seed))
+    # the upper bound is exclusive, so this can select any row of the table
+    idx = rng.integers(0, len(table), size=n)
     return table[idx]
 
 
@@ -92,13 +93,25 @@ def update_fluxes(
     # Make a copy to avoid modifying the input in place
     updated_catalog = target_catalog.copy()
 
-    for colname in filter_list:
-        if colname in updated_catalog.colnames:
-            fluxname = f"segment_{colname.lower()}_flux"
-            # convert from nJy (Roman) to maggies (romanisim_input_catalog)
-            converted_flux = njy_to_mgy(flux_catalog[fluxname])
-            # scale fluxes based on reference filter if requested
-            updated_catalog[colname] = converted_flux * scaling_factor
+    common_cols = [x for x in filter_list if x in updated_catalog.colnames]
+    if common_cols:
+        # stack the fluxes (in nJy, whatever the unit of each column) so that
+        # the conversion and the scaling are done in a single vectorized
+        # operation instead of once per column
+        fluxes = np.column_stack(
+            [
+                u.Quantity(flux_catalog[f"segment_{colname.lower()}_flux"]).to_value(
+                    u.nJy
+                )
+                for colname in common_cols
+            ]
+        )
+        # convert from nJy (Roman) to maggies (romanisim_input_catalog)
+        # and scale fluxes based on reference filter
+        njy_to_mgy_factor = njy_to_mgy(1 * u.nJy).value
+        converted_fluxes = fluxes * (njy_to_mgy_factor * scaling_factor)[:, None]
+        for i, colname in enumerate(common_cols):
+            updated_catalog[colname] = converted_fluxes[:, i] * u.mgy
 
     # Add source ID from roman_simulated_catalog
     updated_catalog["label"] = flux_catalog["label"]
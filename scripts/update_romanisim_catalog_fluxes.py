@@ -67,25 +67,30 @@ if __name__ == "__main__":
     if args.nobj is not None:
         if args.nobj > len(romanisim_cat):
             raise ValueError(
-                "number of objects must be smaller than the number of objects"
+                "number of objects must be smaller than the number of objects "
                 "in the target catalog."
             )
-        rng = np.random.default_rng()
+        rng = np.random.Generator(np.random.SFC64(13))
         romanisim_cat = romanisim_cat[
             rng.choice(len(romanisim_cat), args.nobj, replace=False)
         ]
     # roman_photoz_catalog fluxes are in nJy
     rpz_cat = Table.read(roman_photoz_catalog_filename, format="parquet")
     # create an array of minimum magnitudes across all selected flux columns
-    # (this will be used as a boolean mask to filter out invalid objects)
-    minmag = np.min(
-        [
-            -2.5 * np.log10(njy_to_mgy(rpz_cat[x]).value)
-            for x in rpz_cat.dtype.names
-            if x.endswith("_flux") and x.startswith("segment")
-        ],
-        axis=0,
-    )
+    # (this will be used as a boolean mask to filter out invalid objects);
+    # the minimum is accumulated in place to avoid stacking all the columns
+    flux_cols = [
+        x
+        for x in rpz_cat.dtype.names
+        if x.endswith("_flux") and x.startswith("segment")
+    ]
+    minmag = np.full(len(rpz_cat), np.inf)
+    for x in flux_cols:
+        # np.minimum (rather than np.fmin) propagates NaNs, so objects with
+        # invalid fluxes are still rejected by the mask below
+        np.minimum(
+            minmag, -2.5 * np.log10(njy_to_mgy(rpz_cat[x]).value), out=minmag
+        )
     # Create a filter mask to filter out objects outside the valid magnitude range
     rpz_cat = rpz_cat[(minmag > 0) & (minmag < 33)]
     # create a random catalog from rpz_cat with the same number of rows as romanisim_cat